@@ -1,3 +1,4 @@
+import errno
 import os
 from pathlib import Path
 import shutil
@@ -13,6 +14,31 @@ sys.path.insert(0, str(Path(__file__).resolve().parent / "lib"))
 import guessit
 
 
+def scan_files(root):
+    """Yields a DirEntry for every file below root in the same top-down order
+    as os.walk, but without the extra stat calls of os.walk and os.path.getsize.
+    """
+    try:
+        with os.scandir(root) as it:
+            # Read the whole directory first, files get renamed while iterating
+            entries = list(it)
+    except OSError:
+        return
+    dirs = []
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        if is_dir:
+            if not entry.is_symlink():
+                dirs.append(entry.path)
+        else:
+            yield entry
+    for path in dirs:
+        yield from scan_files(path)
+
+
 class Apply:
     def __init__(self, options: Options = None):
         self.options = options and options or Options()
@@ -21,10 +47,10 @@ class Apply:
         # Indicate if any files have been moved and NZB needs to be notified
         self.files_moved = False
 
-        # List of moved files (source path)
-        self.moved_src_files = []
-        # List of moved files (destination path)
-        self.moved_dst_files = []
+        # Set of moved files (source path)
+        self.moved_src_files = set()
+        # Moved files (destination path), a dict is used as an ordered set
+        self.moved_dst_files = {}
 
     def unique_name(self, new):
         """Adds unique numeric suffix to destination file name to avoid overwriting
@@ -44,8 +70,12 @@ class Apply:
 
     def optimized_move(old, new):
         try:
-            os.rename(old, new)
+            os.replace(old, new)
         except OSError as ex:
+            # Only a move across file systems needs the copy, shutil.copyfile
+            # already uses sendfile where the platform supports it
+            if ex.errno != errno.EXDEV:
+                raise
             logdet("Rename failed ({}), performing copy: {}".format(ex, new))
             shutil.copyfile(old, new)
             os.remove(old)
@@ -56,7 +86,7 @@ class Apply:
         """
         if os.path.exists(new) or new in self.moved_dst_files:
             if self.options.overwrite and new not in self.moved_dst_files:
-                os.remove(new)
+                # os.replace overwrites the existing file atomically
                 Apply.optimized_move(old, new)
                 loginf("Overwrote: %s" % new)
             else:
@@ -65,97 +95,100 @@ class Apply:
                 self.rename(old, new)
         else:
             if not self.options.preview:
-                if not os.path.exists(os.path.dirname(new)):
-                    os.makedirs(os.path.dirname(new))
+                os.makedirs(os.path.dirname(new), exist_ok=True)
                 Apply.optimized_move(old, new)
             loginf("Moved: %s" % new)
-        self.moved_src_files.append(old)
-        self.moved_dst_files.append(new)
+        self.moved_src_files.add(old)
+        self.moved_dst_files[new] = None
         return new
 
     def move_satellites(self, videofile, dest):
         """Moves satellite files such as subtitles that are associated with base
         and stored in root to the correct dest.
         """
-        if self.options.verbose:
+        verbose = self.options.verbose
+        if verbose:
             loginf("Move satellites for %s" % videofile)
 
         root = os.path.dirname(videofile)
         destbasenm = os.path.splitext(dest)[0]
         base = os.path.basename(os.path.splitext(videofile)[0])
-        for dirpath, dirnames, filenames in os.walk(root):
-            for filename in filenames:
-                fbase, fext = os.path.splitext(filename)
-                fextlo = fext.lower()
-                fpath = os.path.join(dirpath, filename)
-
-                if fextlo in self.options._SATELLITE_EXTENSIONS:
-                    # Handle subtitles and nfo files
-                    subpart = ""
-                    # We support GuessIt supported subtitle extensions
-                    if fextlo[1:] in self.options._SATELLITE_EXTENSIONS:
-                        guess = guessit.guessit(filename)
-                        if guess and "subtitle_language" in guess:
-                            fbase = fbase[: fbase.rfind(".")]
-                            # Use alpha2 subtitle language from GuessIt (en, es, de, etc.)
-                            subpart = "." + guess["subtitle_language"].alpha2
-                        if self.options.verbose:
-                            if subpart != "":
-                                loginf(
-                                    "Satellite: %s is a subtitle [%s]"
-                                    % (filename, guess["subtitle_language"])
-                                )
-                            else:
-                                # English (or undetermined)
-                                loginf("Satellite: %s is a subtitle" % filename)
-                    elif (fbase.lower() != base.lower()) and fextlo == ".nfo":
-                        # Aggressive match attempt
-                        if self.options.deep_scan:
-                            guess = self.deep_scan_nfo(fpath)
-                            if guess is not None:
-                                # Guess details are not important, just that there was a match
-                                fbase = base
-                    if fbase.lower() == base.lower():
-                        old = fpath
-                        new = destbasenm + subpart + fext
-                        if self.options.verbose:
-                            loginf("Satellite: %s" % os.path.basename(new))
-                        self.rename(old, new)
+        for entry in scan_files(root):
+            filename = entry.name
+            fbase, fext = os.path.splitext(filename)
+            fextlo = fext.lower()
+            fpath = entry.path
+
+            if fextlo in self.options._SATELLITE_EXTENSIONS:
+                # Handle subtitles and nfo files
+                subpart = ""
+                # We support GuessIt supported subtitle extensions
+                if fextlo[1:] in self.options._SATELLITE_EXTENSIONS:
+                    guess = guessit.guessit(filename)
+                    if guess and "subtitle_language" in guess:
+                        fbase = fbase[: fbase.rfind(".")]
+                        # Use alpha2 subtitle language from GuessIt (en, es, de, etc.)
+                        subpart = "." + guess["subtitle_language"].alpha2
+                    if verbose:
+                        if subpart != "":
+                            loginf(
+                                "Satellite: %s is a subtitle [%s]"
+                                % (filename, guess["subtitle_language"])
+                            )
+                        else:
+                            # English (or undetermined)
+                            loginf("Satellite: %s is a subtitle" % filename)
+            elif (fbase.lower() != base.lower()) and fextlo == ".nfo":
+                # Aggressive match attempt
+                if self.options.deep_scan:
+                    guess = self.deep_scan_nfo(fpath)
+                    if guess is not None:
+                        # Guess details are not important, just that there was a match
+                        fbase = base
+            if fbase.lower() == base.lower():
+                old = fpath
+                new = destbasenm + subpart + fext
+                if verbose:
+                    loginf("Satellite: %s" % os.path.basename(new))
+                self.rename(old, new)
 
     def deep_scan_nfo(self, filename, ratio=None):
+        verbose = self.options.verbose
         if ratio is None:
             ratio = self.options.deep_scan_ratio
-        if self.options.verbose:
+        if verbose:
             loginf("Deep scanning satellite: %s (ratio=%.2f)" % (filename, ratio))
         best_guess = None
         best_ratio = 0.00
         try:
-            nfo = open(filename)
-            # Convert file content into iterable words
-            for word in "".join([item for item in nfo.readlines()]).split():
-                try:
-                    guess = guessit.guessit(word + ".nfo")
-                    # Series = TV, Title = Movie
-                    if any(item in guess for item in ("title")):
-                        # Compare word against NZB name
-                        diff = difflib.SequenceMatcher(
-                            None, word, self.options.nzb_name
+            data = Path(filename).read_bytes()
+            try:
+                text = data.decode("utf-8")
+            except UnicodeDecodeError:
+                # Scene NFO files are usually encoded in the DOS code page
+                text = data.decode("cp437")
+            # Convert file content into iterable words, NFO files repeat many
+            # words (e.g. in their "artwork") so test each distinct word only once
+            for word in dict.fromkeys(text.split()):
+                # Compare word against NZB name
+                word_ratio = difflib.SequenceMatcher(
+                    None, word, self.options.nzb_name
+                ).ratio()
+                if verbose:
+                    loginf("Tested: %s (ratio=%.2f)" % (word, word_ratio))
+                # Evaluate ratio against threshold and previous matches before
+                # running the much more expensive guess
+                if word_ratio < ratio or word_ratio <= best_ratio:
+                    continue
+                guess = guessit.guessit(word + ".nfo")
+                # Series = TV, Title = Movie
+                if any(item in guess for item in ("title")):
+                    if verbose:
+                        loginf(
+                            "Possible match found: %s (ratio=%.2f)" % (word, word_ratio)
                         )
-                        # Evaluate ratio against threshold and previous matches
-                        if self.options.verbose:
-                            loginf("Tested: %s (ratio=%.2f)" % (word, diff.ratio()))
-                        if diff.ratio() >= ratio and diff.ratio() > best_ratio:
-                            if self.options.verbose:
-                                loginf(
-                                    "Possible match found: %s (ratio=%.2f)"
-                                    % (word, diff.ratio())
-                                )
-                            best_guess = guess
-                            best_ratio = diff.ratio()
-                except UnicodeDecodeError:
-                    # Ignore non-unicode words (common in nfo "artwork")
-                    pass
-            nfo.close()
+                    best_guess = guess
+                    best_ratio = word_ratio
         except IOError as e:
             logerr("%s" % str(e))
         return best_guess
@@ -167,33 +200,29 @@ class Apply:
         if self.options.verbose:
             loginf("Cleanup")
 
-        # Check if there are any big files remaining
+        # Check if there are any big files remaining and collect the files to
+        # delete in the same pass
         keep_download_dir = False
-        for root, dirs, files in os.walk(self.options.download_dir):
-            for filename in files:
-                path = Path(root) / filename
-                if path in self.moved_dst_files:
-                    keep_download_dir = True
-                    continue
+        delete_paths = []
+        for entry in scan_files(self.options.download_dir):
+            path = Path(entry.path)
+            if path in self.moved_dst_files:
+                keep_download_dir = True
+                continue
+            if not self.options.preview or (path not in self.moved_src_files):
                 # Check minimum file size
-                if os.path.getsize(path) >= self.options.min_size and (
-                    not self.options.preview or (path not in self.moved_src_files)
-                ):
+                if entry.stat().st_size >= self.options.min_size:
                     logwar(
                         "Skipping clean up due to large files remaining in the directory"
                     )
                     return
+                delete_paths.append(path)
 
         # Now delete all files with nice logging
-        for root, dirs, files in os.walk(self.options.download_dir):
-            for filename in files:
-                path = Path(root) / filename
-                if path in self.moved_dst_files:
-                    continue
-                if not self.options.preview or path not in self.moved_src_files:
-                    if not self.options.preview:
-                        path.unlink()
-                    loginf("Deleted: %s" % path)
+        for path in delete_paths:
+            if not self.options.preview:
+                path.unlink()
+            loginf("Deleted: %s" % path)
         if not keep_download_dir:
             if not self.options.preview:
                 shutil.rmtree(self.options.download_dir)
@@ -203,34 +232,34 @@ class Apply:
         # Process all the files in download_dir and its subdirectories
         video_files = []
 
-        for root, dirs, downloaded_files in os.walk(self.options.download_dir):
-            for downloaded_file in downloaded_files:
-                try:
-                    downloaded_file_path = Path(root) / downloaded_file
-
-                    # Check extension
-                    if (
-                        downloaded_file_path.suffix.lower().lstrip(".")
-                        not in self.options._VIDEO_EXTENSIONS
-                    ):
-                        continue
-
-                    # Check minimum file size
-                    downloaded_file_size = downloaded_file_path.stat().st_size
-                    if downloaded_file_size < self.options.min_size:
-                        loginf(
-                            f'Skipping "{str(downloaded_file)}" as its size={downloaded_file_size} < {self.options.min_size}'
-                        )
-                        continue
+        for entry in scan_files(self.options.download_dir):
+            downloaded_file = entry.name
+            try:
+                # Check extension, on the name so that other files cost no Path
+                if (
+                    os.path.splitext(downloaded_file)[1].lower().lstrip(".")
+                    not in self.options._VIDEO_EXTENSIONS
+                ):
+                    continue
 
-                    # This is our video file, we should process it
-                    video_files.append(downloaded_file_path)
+                downloaded_file_path = Path(entry.path)
 
-                except Exception as e:
-                    errors = True
-                    logerr("Failed: %s" % downloaded_file)
-                    logerr("Exception: %s" % e)
-                    traceback.print_exc()
+                # Check minimum file size
+                downloaded_file_size = entry.stat().st_size
+                if downloaded_file_size < self.options.min_size:
+                    loginf(
+                        f'Skipping "{str(downloaded_file)}" as its size={downloaded_file_size} < {self.options.min_size}'
+                    )
+                    continue
+
+                # This is our video file, we should process it
+                video_files.append(downloaded_file_path)
+
+            except Exception as e:
+                errors = True
+                logerr("Failed: %s" % downloaded_file)
+                logerr("Exception: %s" % e)
+                traceback.print_exc()
 
         # Determine whether we can use the NZB name for the destination path
         # Note: The value of self.options.use_nzb_name is used in the `Determine` class
@@ -261,14 +290,11 @@ class Apply:
                 traceback.print_exc()
 
         # Inform NZBGet about new destination path
-        finaldir = ""
-        uniquedirs = []
-        for filename in self.moved_dst_files:
-            dir = os.path.dirname(filename)
-            if dir not in uniquedirs:
-                uniquedirs.append(dir)
-                finaldir += "|" if finaldir != "" else ""
-                finaldir += dir
+        finaldir = "|".join(
+            dict.fromkeys(
+                os.path.dirname(filename) for filename in self.moved_dst_files
+            )
+        )
 
         if finaldir != "":
             # Ensure that this is output without a prefix like `INFO` or `WARNING`
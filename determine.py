@@ -1,6 +1,7 @@
+import functools
 import os
 import re
-from pathlib import Path
+from pathlib import Path, PurePath
 from nzbget_utils import loginf, logerr, logwar
 from options import Options
 
@@ -13,6 +14,10 @@ import guessit
 # * From SABnzbd+ (with modifications) *
 class Determine:
     _STRIP_AFTER = ("_", ".", "-")
+    # Leading and trailing runs of whitespace and strip-characters
+    _RE_STRIP_AFTER = re.compile(
+        r"\A[\s{0}]+|[\s{0}]+\Z".format(re.escape("".join(_STRIP_AFTER)))
+    )
 
     _REPLACE_AFTER = {
         "()": "",
@@ -23,11 +28,134 @@ class Determine:
         " - - ": " - ",
         "--": "-",
     }
-    _RE_UPPERCASE = re.compile(r"{{([^{]*)}}")
-    _RE_LOWERCASE = re.compile(r"{([^{]*)}")
+
+    # All _REPLACE_AFTER keys in a single alternation, longest first
+    _RE_REPLACE_AFTER = re.compile(
+        "|".join(
+            re.escape(key) for key in sorted(_REPLACE_AFTER, key=len, reverse=True)
+        )
+    )
+
+    # Translation tables for the dotted, underscored and spaced name variants
+    _DOTS_TABLE = str.maketrans({" ": ".", "_": ".", "(": ".", ")": "."})
+    _UNDERSCORES_TABLE = str.maketrans({" ": "_", ".": "_"})
+    _SPACES_TABLE = str.maketrans({"_": " ", ".": " "})
+    _WORDS_TABLE = str.maketrans({"-": " ", ".": " ", "_": " "})
+
+    # Names without any of these word separators are considered obfuscated
+    _SEPARATOR_CHARS = frozenset("._ ")
+
+    # Text enclosed in {{}} (group 1) is uppercased, text enclosed in {} (group 2)
+    # is lowercased
+    _RE_LETTER_CASE = re.compile(r"{{([^{]*)}}|{([^{]*)}")
+
+    # Characters not allowed in file names
+    _RE_INVALID_CHARS = re.compile(r"[\"\:\?\*\\\/\<\>\|]")
+    _RE_CASE_CHECK = re.compile(
+        r"^[A-Z0-9]+.+\b\d{3,4}p\b.*-[-A-Za-z0-9]+[A-Z]+[-A-Za-z0-9]*$"
+    )
+    _RE_TITLE_MATCH = re.compile(r"(.+?)\b\d{3,4}p\b", re.IGNORECASE)
+    # The last year in a line that is not at its start; anchored to line starts
+    # because a match from any later position implies one from the line start
+    _RE_YEAR_PAREN = re.compile(r"^..*(\((19|20)\d\d\))", re.MULTILINE)
+    _RE_YEAR_BARE = re.compile(r"^..*((19|20)\d\d)", re.MULTILINE)
+    # Title specifiers using dots or underscores as word separators
+    _RE_DUPE_DOTS = re.compile(r"%(?:\.t|s\.[nN])")
+    _RE_DUPE_UNDERSCORES = re.compile(r"%(?:_t|s_[nN])")
+    # Extension specifier at the end of a format string, optionally within braces
+    _RE_EXT_SPECIFIER = re.compile(r"\.%ext}*\Z", re.IGNORECASE)
+    _RE_IMDB = re.compile(r"^http://www.imdb.com/title/(tt[0-9]+)/$", re.IGNORECASE)
+
+    # Case-fixing terms applied to the de-obfuscated dirname
+    _CASE_FIX_TERMS = (
+        (r"(\d{3,4})p", r"\1p"),
+        (r"x(\d{3,4})", r"x\1"),
+        (r"(\d{2,2}Bit)", r"\1Bit"),
+        (r"BluRay", "BluRay"),
+        (r"Web(.?)DL", r"Web\1DL"),
+        (r"Web(.?)Rip", r"Web\1Rip"),
+        (r"AAC", "AAC"),
+        (r"Dolby", "Dolby"),
+        (r"Atmos", "Atmos"),
+        (r"TrueHD", "TrueHD"),
+        (r"DD([57]).?1", "DD\1.1"),
+        (r"DTS.?X", r"DTS-X"),
+        (r"DTS.?HD", r"DTS-HD"),
+        (r"DTS.?ES", r"DTS-ES"),
+        (r"DTS.?HD.?MA", r"DTS-HD.?MA"),
+    )
+
+    # Destination dir option, format option and mapping method for each video type
+    _VTYPES = {
+        "movie": ("movies_dir", "movies_format", "add_movies_mapping"),
+        "series": ("series_dir", "series_format", "add_series_mapping"),
+        "dated": ("dated_dir", "dated_format", "add_dated_mapping"),
+        "othertv": ("othertv_dir", "othertv_format", "add_movies_mapping"),
+    }
 
     def __init__(self, options: Options):
         self.options = options
+        self._release_groups = None
+        self._compile_case_fix_terms()
+
+        # Configured spelling of the lower and upper words by their lowercased
+        # title, the upper words are added last so they take precedence
+        self._title_case_words = {
+            x.title().lower(): x
+            for x in (*self.options.lower_words, *self.options.upper_words)
+            if x
+        }
+        # All words in a single whole-word alternation, longest first
+        self._title_case_re = re.compile(
+            r"\b(?:{})\b".format(
+                "|".join(
+                    re.escape(x.title())
+                    for x in sorted(
+                        self._title_case_words.values(), key=len, reverse=True
+                    )
+                )
+            ),
+            re.IGNORECASE,
+        )
+
+        # Results of get_titles() keyed by (name, apply_title_case)
+        self._titles_cache = {}
+        # Results of get_deobfuscated_dirname() keyed by (dirname, deobfuscate_re, name)
+        self._deobfuscated_dirname_cache = {}
+        # Results of guess_dupe_separator() keyed by format
+        self._dupe_separators = {}
+
+    def _compile_case_fix_terms(self):
+        """(Re)compile the case-fixing terms if the release groups have changed"""
+        release_groups = tuple(self.options.release_groups)
+        if release_groups == self._release_groups:
+            return
+        self._release_groups = release_groups
+        # Configured spelling of each release group by its case-folded name
+        self._release_groups_casefold = {}
+        for release_group in release_groups:
+            self._release_groups_casefold.setdefault(
+                release_group.casefold(), release_group
+            )
+        release_groups_re = "|".join(re.escape(token) for token in release_groups)
+        self._case_fix_terms = [
+            (re.compile(pattern, re.IGNORECASE), repl)
+            for pattern, repl in Determine._CASE_FIX_TERMS
+        ]
+        self._case_fix_terms.append(
+            (
+                re.compile(
+                    r"-(([A-Za-z0-9]+)|{})$".format(release_groups_re), re.IGNORECASE
+                ),
+                self._scene_group_case,
+            )
+        )
+
+    def _scene_group_case(self, match):
+        extra_group = self._release_groups_casefold.get(match.group(1).casefold())
+        if extra_group is not None:
+            return "-" + extra_group
+        return "-" + match.group(1).upper().replace("I", "i")
 
     def path_subst(path, mapping):
         """Replace the sort sting elements by real values.
@@ -35,154 +163,108 @@ class Determine:
         path = the sort string
         mapping = array of tuples that maps all elements to their values
         """
-        newpath = []
-        plen = len(path)
-        n = 0
-
-        # Sort list of mapping tuples by their first elements. First ascending by element,
-        # then descending by element length.
-        # Preparation to replace elements from longest to shortest in alphabetical order.
+        # Elements are only recognized at a "%"; if an element is mapped more than
+        # once, the first entry wins
+        elements = {}
+        for key, value, msg in deprecation_support(mapping):
+            if key.startswith("%"):
+                elements.setdefault(key, (value, msg))
+        if not elements:
+            return path
+
+        def subst(match):
+            key = match.group(0)
+            value, msg = elements[key]
+            if msg:
+                logwar("specifier %s is deprecated, %s" % (key, msg))
+            return ".".join(value) if isinstance(value, list) else str(value)
+
+        # Sort the distinct elements descending by length, then ascending by
+        # element, so that the longest element matches first.
         #
-        # >>> m = [('bb', 4), ('aa', 3), ('b', 6), ('aaa', 2), ('zzzz', 1), ('a', 5)]
-        # >>> m.sort(key=lambda t: t[0])
-        # >>> m
-        # [('a', 5), ('aa', 3), ('aaa', 2), ('b', 6), ('bb', 4), ('zzzz', 1)]
-        # >>> m.sort(key=lambda t: len(t[0]), reverse=True)
-        # >>> m
-        # [('zzzz', 1), ('aaa', 2), ('aa', 3), ('bb', 4), ('a', 5), ('b', 6)]
-        mapping.sort(key=lambda t: t[0])
-        mapping.sort(key=lambda t: len(t[0]), reverse=True)
-
-        while n < plen:
-            result = path[n]
-            if result == "%":
-                for key, value, msg in deprecation_support(mapping):
-                    if path.startswith(key, n):
-                        n += len(key) - 1
-                        result = value
-                        if msg:
-                            logwar("specifier %s is deprecated, %s" % (key, msg))
-                        break
-            newpath.append(result)
-            n += 1
-        return "".join(
-            map(lambda x: ".".join(x) if isinstance(x, list) else str(x), newpath)
-        )
+        # >>> sorted(["bb", "aa", "b", "aaa", "zzzz", "a"], key=lambda k: (-len(k), k))
+        # ['zzzz', 'aaa', 'aa', 'bb', 'a', 'b']
+        keys = tuple(sorted(elements, key=lambda k: (-len(k), k)))
+        return Determine._elements_re(keys).sub(subst, path)
 
-    def get_deobfuscated_dirname(self, dirname, deobfuscate_re, name=None):
-        dirname_clean = dirname.strip()
-        dirname = dirname_clean
-        if deobfuscate_re:
-            dirname_deobfuscated = re.sub(deobfuscate_re, r"\1", dirname_clean)
-            dirname = dirname_deobfuscated
-            if self.options.verbose:
-                loginf(
-                    'De-obfuscated NZB dirname: "{}" --> "{}"'.format(
-                        dirname_clean, dirname_deobfuscated
-                    )
-                )
-        else:
-            if self.options.verbose:
-                logerr(
-                    "Cannot de-obfuscate NZB dirname: "
-                    'invalid value for configuration value "DeobfuscateWords": "{}"'.format(
-                        self.options.deobfuscate_words
-                    )
-                )
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _elements_re(elements):
+        """Return a compiled alternation of the sort string 'elements'.
+        The alternation tries the elements in order, i.e. longest first, so that
+        a single left-to-right scan replaces every element with its longest match.
+        """
+        return re.compile("|".join(re.escape(key) for key in elements))
 
+    def get_deobfuscated_dirname(self, dirname, deobfuscate_re, name=None):
+        key = (dirname.strip(), deobfuscate_re, name)
+        dirnames = self._deobfuscated_dirname_cache.get(key)
+        if dirnames is None:
+            dirnames = self._make_deobfuscated_dirname(*key)
+            self._deobfuscated_dirname_cache[key] = dirnames
+        return dirnames
+
+    def _make_deobfuscated_dirname(self, dirname, deobfuscate_re, name):
+        verbose = self.options.verbose
         if name:
+            # Case-fix the (cached) de-obfuscated dirname instead of redoing it
+            dirname = self.get_deobfuscated_dirname(dirname, deobfuscate_re)[0]
+
             # Determine if file name is likely to be properly cased
-            case_check_re = (
-                r"^[A-Z0-9]+.+\b\d{3,4}p\b.*-[-A-Za-z0-9]+[A-Z]+[-A-Za-z0-9]*$"
-            )
-            if re.match(case_check_re, dirname):
-                loginf(f"Not fixing a properly cased dirname: '{dirname}'")
+            if Determine._RE_CASE_CHECK.match(dirname):
+                if verbose:
+                    loginf(f"Not fixing a properly cased dirname: '{dirname}'")
             else:
+                self._compile_case_fix_terms()
                 title, _, _ = self.get_titles(name, True)
-                dirname_title = []
-
-                release_groups_list = [
-                    re.escape(token) for token in self.options.release_groups
-                ]
-                release_groups_re = "|".join(release_groups_list)
 
-                def re_unescape(escaped_re):
-                    return re.sub(r"\\(.)", r"\1", escaped_re)
-
-                def scene_group_case(match):
-                    for extra_group in release_groups_list:
-                        loginf(
-                            f"Comparing extra group '{extra_group}' with match '{match.group(1)}'"
-                        )
-                        if re.match(
-                            f"{extra_group}$", match.group(1), flags=re.IGNORECASE
-                        ):
-                            return "-" + re_unescape(extra_group)
-                    return "-" + re.sub(r"I", "i", match.group(1).upper())
-
-                terms = [
-                    (r"(\d{3,4})p", r"\1p"),
-                    (r"x(\d{3,4})", r"x\1"),
-                    (r"(\d{2,2}Bit)", r"\1Bit"),
-                    (r"BluRay", "BluRay"),
-                    (r"Web(.?)DL", r"Web\1DL"),
-                    (r"Web(.?)Rip", r"Web\1Rip"),
-                    (r"AAC", "AAC"),
-                    (r"Dolby", "Dolby"),
-                    (r"Atmos", "Atmos"),
-                    (r"TrueHD", "TrueHD"),
-                    (r"DD([57]).?1", "DD\1.1"),
-                    (r"DTS.?X", r"DTS-X"),
-                    (r"DTS.?HD", r"DTS-HD"),
-                    (r"DTS.?ES", r"DTS-ES"),
-                    (r"DTS.?HD.?MA", r"DTS-HD.?MA"),
-                    (
-                        r"-(([A-Za-z0-9]+)|{})$".format(release_groups_re),
-                        scene_group_case,
-                    ),
-                ]
-
-                title_match_re = r"(.+?)\b\d{3,4}p\b"
-                title_match = re.search(title_match_re, dirname, flags=re.IGNORECASE)
+                title_match = Determine._RE_TITLE_MATCH.search(dirname)
                 if title_match:
                     title_len = min(len(title_match.group(1)), len(title))
-                    loginf(
-                        f'Comparing dirname "{dirname[0:title_len]}" with titled dirname: "{title[0:title_len]}"'
-                    )
-                    for idx in range(title_len):
-                        if (
-                            dirname[idx] != title[idx]
-                            and dirname[idx].lower() == title[idx].lower()
-                        ):
-                            dirname_title.append(title[idx])
-                        else:
-                            dirname_title.append(dirname[idx])
+                    if verbose:
+                        loginf(
+                            f'Comparing dirname "{dirname[0:title_len]}" with titled dirname: "{title[0:title_len]}"'
+                        )
+                    dirname_title = [
+                        t if d != t and d.lower() == t.lower() else d
+                        for d, t in zip(dirname[:title_len], title[:title_len])
+                    ]
 
                     dirname = "".join(dirname_title) + dirname[title_len:]
                 else:
-                    logwar(f'dirname "{dirname}" does not match {title_match_re}"')
-
-                for term in terms:
-                    dirname = re.sub(term[0], term[1], dirname, flags=re.IGNORECASE)
-
-                loginf(f'Case-fixed dirname: "{dirname}"')
+                    logwar(
+                        f'dirname "{dirname}" does not match {Determine._RE_TITLE_MATCH.pattern}"'
+                    )
 
-        # The title with spaces replaced by dots
-        dots = dirname.replace(" - ", "-").replace(" ", ".").replace("_", ".")
-        dots = dots.replace("(", ".").replace(")", ".").replace("..", ".").rstrip(".")
+                for pattern, repl in self._case_fix_terms:
+                    dirname = pattern.sub(repl, dirname)
 
-        # The dirname with spaces replaced by underscores
-        underscores = (
-            dirname.replace(" ", "_").replace(".", "_").replace("__", "_").rstrip("_")
-        )
+                if verbose:
+                    loginf(f'Case-fixed dirname: "{dirname}"')
+        elif deobfuscate_re:
+            dirname_deobfuscated = deobfuscate_re.sub(r"\1", dirname)
+            if verbose:
+                loginf(
+                    'De-obfuscated NZB dirname: "{}" --> "{}"'.format(
+                        dirname, dirname_deobfuscated
+                    )
+                )
+            dirname = dirname_deobfuscated
+        elif verbose:
+            logerr(
+                "Cannot de-obfuscate NZB dirname: "
+                'invalid value for configuration value "DeobfuscateWords": "{}"'.format(
+                    self.options.deobfuscate_words
+                )
+            )
 
-        # The dirname with dots and underscores replaced by spaces
-        spaces = (
-            dirname.replace("_", " ").replace(".", " ").replace("  ", " ").rstrip(" ")
+        return (
+            dirname,
+            Determine.to_dots(dirname),
+            Determine.to_underscores(dirname),
+            Determine.to_spaces(dirname),
         )
 
-        return dirname, dots, underscores, spaces
-
     def to_title_case(self, text):
         """
         Improved version of Python's title() function.
@@ -199,15 +281,10 @@ class Determine:
         # Fix Python's title() bug with apostrophes
         title = title.replace("'S", "'s")
 
-        # Make sure some words such as 'and' or 'of' stay lowercased
-        for x in self.options.lower_words:
-            xtitled = x.title()
-            title = Determine.replace_word(title, xtitled, x)
-
-        # Make sure some words such as 'III' or 'IV' stay uppercased
-        for x in self.options.upper_words:
-            xtitled = x.title()
-            title = Determine.replace_word(title, xtitled, x)
+        # Make sure some words such as 'and' or 'of' stay lowercased and
+        # some words such as 'III' or 'IV' stay uppercased
+        if self._title_case_words:
+            title = self._title_case_re.sub(self._title_case_word, title)
 
         # Make sure the first letter of the title is always uppercase
         if title:
@@ -215,6 +292,10 @@ class Determine:
 
         return title
 
+    def _title_case_word(self, match):
+        word = match.group(0)
+        return self._title_case_words.get(word.lower(), word)
+
     def get_titles(self, name, apply_title_case=False):
         """
         Generates three variations of a title with improved title casing.
@@ -226,51 +307,42 @@ class Determine:
         Returns:
             tuple: Three variations of the title (normal, dots, underscores)
         """
+        key = (name, apply_title_case)
+        titles = self._titles_cache.get(key)
+        if titles is None:
+            titles = self._make_titles(name, apply_title_case)
+            self._titles_cache[key] = titles
+        return titles
+
+    def _make_titles(self, name, apply_title_case):
         # make valid filename
-        title = re.sub(r"[\"\:\?\*\\\/\<\>\|]", " ", name)
+        title = Determine._RE_INVALID_CHARS.sub(" ", name)
 
         if apply_title_case:
             title = self.to_title_case(title)
 
-        # The title with spaces replaced by dots
-        dots = title.replace(" - ", "-").replace(" ", ".").replace("_", ".")
-        dots = dots.replace("(", ".").replace(")", ".").replace("..", ".").rstrip(".")
-
-        # The title with spaces replaced by underscores
-        underscores = (
-            title.replace(" ", "_").replace(".", "_").replace("__", "_").rstrip("_")
-        )
-
-        return title, dots, underscores
+        return title, Determine.to_dots(title), Determine.to_underscores(title)
 
     @staticmethod
-    def replace_word(text, word_old, word_new):
-        """
-        Replace a word in text while maintaining word boundaries.
-        This ensures we only replace whole words, not parts of words.
-
-        Args:
-            text (str): The text to process
-            word_old (str): The word to find
-            word_new (str): The word to replace it with
-
-        Returns:
-            str: The text with the word replaced
-        """
-
-        def replace_word_case_sensitive(text, word_old, word_new):
-            pattern = r"\b" + re.escape(word_old) + r"\b"
-            return re.sub(pattern, word_new, text)
-
-        # Try case-sensitive replacement first
-        result = replace_word_case_sensitive(text, word_old, word_new)
+    def to_dots(text):
+        """Return 'text' with spaces, underscores and parentheses replaced by dots"""
+        dots = text.replace(" - ", "-").translate(Determine._DOTS_TABLE)
+        # The single-pass collapse can leave several trailing separators, so
+        # rstrip() is needed here (and below) rather than removesuffix(); it
+        # returns the string itself when there is nothing to strip
+        return dots.replace("..", ".").rstrip(".")
 
-        # If no replacement was made, try case-insensitive
-        if result == text:
-            pattern = r"\b" + re.escape(word_old) + r"\b"
-            result = re.sub(pattern, word_new, text, flags=re.IGNORECASE)
+    @staticmethod
+    def to_underscores(text):
+        """Return 'text' with spaces and dots replaced by underscores"""
+        underscores = text.translate(Determine._UNDERSCORES_TABLE)
+        return underscores.replace("__", "_").rstrip("_")
 
-        return result
+    @staticmethod
+    def to_spaces(text):
+        """Return 'text' with dots and underscores replaced by spaces"""
+        spaces = text.translate(Determine._SPACES_TABLE)
+        return spaces.replace("  ", " ").rstrip(" ")
 
     @staticmethod
     def get_decades(year):
@@ -304,28 +376,22 @@ class Determine:
         return decade, decade2
 
     @staticmethod
-    def to_lowercase(path):
-        """Lowercases any characters enclosed in {}"""
-        while True:
-            m = Determine._RE_LOWERCASE.search(path)
-            if not m:
-                break
-            path = path[: m.start()] + m.group(1).lower() + path[m.end() :]
+    def change_case(path):
+        """Uppercases any characters enclosed in {{}} and lowercases any characters
+        enclosed in {}"""
 
-        # just incase
-        path = path.replace("{", "")
-        path = path.replace("}", "")
-        return path
+        def change(m):
+            if m.group(1) is not None:
+                return m.group(1).upper()
+            return m.group(2).lower()
 
-    @staticmethod
-    def to_uppercase(path):
-        """Lowercases any characters enclosed in {{}}"""
-        while True:
-            m = Determine._RE_UPPERCASE.search(path)
-            if not m:
-                break
-            path = path[: m.start()] + m.group(1).upper() + path[m.end() :]
-        return path
+        # Substituting may expose new enclosures in nested braces, repeat until stable
+        count = 1
+        while count:
+            path, count = Determine._RE_LETTER_CASE.subn(change, path)
+
+        # just incase
+        return path.replace("{", "").replace("}", "")
 
     @staticmethod
     def strip_folders(path):
@@ -333,36 +399,39 @@ class Determine:
         f = path.strip("/").split("/")
 
         # For path beginning with a slash, insert empty element to prevent loss
-        if len(path.strip()) > 0 and path.strip()[0] in "/\\":
+        if path.lstrip()[:1] in ("/", "\\"):
             f.insert(0, "")
 
-        def strip_all(x):
-            """Strip all leading/trailing underscores and hyphens
-            also dots for Windows
-            """
-            old_name = ""
-            while old_name != x:
-                old_name = x
-                for strip_char in Determine._STRIP_AFTER:
-                    x = x.strip().strip(strip_char)
-
-            return x
-
-        return os.path.normpath("/".join([strip_all(x) for x in f]))
+        # Strip all leading/trailing underscores and hyphens, also dots for Windows
+        strip_all = Determine._RE_STRIP_AFTER.sub
+        return os.path.normpath("/".join([strip_all("", x) for x in f]))
 
     @staticmethod
     def os_path_split(path):
-        parts = []
-        while True:
-            newpath, tail = os.path.split(path)
-            if newpath == path:
-                if path:
-                    parts.append(path)
-                break
-            parts.append(tail)
-            path = newpath
-        parts.reverse()
-        return parts
+        """Return the list of elements of 'path', including the root if any"""
+        return list(PurePath(path).parts)
+
+    def add_name_mapping(self, specifier, original_name, mapping):
+        """Add the variants of a dir or file name for 'specifier' (e.g. "dn" adds
+        %dn, %^dn, %.dn, %_dn, %^dN, %.dN and %_dN).
+        Returns the name with separators replaced by spaces.
+        """
+        title_name = original_name.translate(Determine._WORDS_TABLE)
+        tname = self.get_titles(title_name, True)
+        name = self.get_titles(title_name, False)
+        specifier_upper = specifier[:-1] + specifier[-1].upper()
+        mapping.extend(
+            (
+                ("%" + specifier, original_name),
+                ("%^" + specifier, tname[0]),
+                ("%." + specifier, tname[1]),
+                ("%_" + specifier, tname[2]),
+                ("%^" + specifier_upper, name[0]),
+                ("%." + specifier_upper, name[1]),
+                ("%_" + specifier_upper, name[2]),
+            )
+        )
+        return title_name
 
     def add_common_mapping(self, old_filename, guess, mapping):
         # Original dir name, file name and extension
@@ -373,67 +442,45 @@ class Determine:
         original_category = os.environ.get("NZBPP_CATEGORY", "")
 
         # Directory name
-        title_name = (
-            original_dirname.replace("-", " ").replace(".", " ").replace("_", " ")
-        )
-        fname_tname, fname_tname_two, fname_tname_three = self.get_titles(
-            title_name, True
-        )
-        fname_name, fname_name_two, fname_name_three = self.get_titles(
-            title_name, False
-        )
-        mapping.append(("%dn", original_dirname))
-        mapping.append(("%^dn", fname_tname))
-        mapping.append(("%.dn", fname_tname_two))
-        mapping.append(("%_dn", fname_tname_three))
-        mapping.append(("%^dN", fname_name))
-        mapping.append(("%.dN", fname_name_two))
-        mapping.append(("%_dN", fname_name_three))
+        self.add_name_mapping("dn", original_dirname, mapping)
 
         # File name
-        title_name = (
-            original_fname.replace("-", " ").replace(".", " ").replace("_", " ")
-        )
-        fname_tname, fname_tname_two, fname_tname_three = self.get_titles(
-            title_name, True
-        )
-        fname_name, fname_name_two, fname_name_three = self.get_titles(
-            title_name, False
-        )
-        mapping.append(("%fn", original_fname))
-        mapping.append(("%^fn", fname_tname))
-        mapping.append(("%.fn", fname_tname_two))
-        mapping.append(("%_fn", fname_tname_three))
-        mapping.append(("%^fN", fname_name))
-        mapping.append(("%.fN", fname_name_two))
-        mapping.append(("%_fN", fname_name_three))
+        title_name = self.add_name_mapping("fn", original_fname, mapping)
 
         # File extension
-        mapping.append(("%ext", original_fext))
-        mapping.append(("%EXT", original_fext.upper()))
-        mapping.append(("%Ext", original_fext.title()))
+        mapping.extend(
+            (
+                ("%ext", original_fext),
+                ("%EXT", original_fext.upper()),
+                ("%Ext", original_fext.title()),
+            )
+        )
 
         # Category
-        category_tname, category_tname_two, category_tname_three = self.get_titles(
-            original_category, True
-        )
-        category_name, category_name_two, category_name_three = self.get_titles(
-            original_category, False
+        category_tname = self.get_titles(original_category, True)
+        category_name = self.get_titles(original_category, False)
+        mapping.extend(
+            (
+                ("%cat", category_tname[0]),
+                ("%.cat", category_tname[1]),
+                ("%_cat", category_tname[2]),
+                ("%cAt", category_name[0]),
+                ("%.cAt", category_name[1]),
+                ("%_cAt", category_name[2]),
+            )
         )
-        mapping.append(("%cat", category_tname))
-        mapping.append(("%.cat", category_tname_two))
-        mapping.append(("%_cat", category_tname_three))
-        mapping.append(("%cAt", category_name))
-        mapping.append(("%.cAt", category_name_two))
-        mapping.append(("%_cAt", category_name_three))
 
         # Video information
-        mapping.append(("%qf", guess.get("source", "")))
-        mapping.append(("%qss", guess.get("screen_size", "")))
-        mapping.append(("%qvc", guess.get("video_codec", "")))
-        mapping.append(("%qac", guess.get("audio_codec", "")))
-        mapping.append(("%qah", guess.get("audio_channels", "")))
-        mapping.append(("%qrg", guess.get("release_group", "")))
+        mapping.extend(
+            (
+                ("%qf", guess.get("source", "")),
+                ("%qss", guess.get("screen_size", "")),
+                ("%qvc", guess.get("video_codec", "")),
+                ("%qac", guess.get("audio_codec", "")),
+                ("%qah", guess.get("audio_channels", "")),
+                ("%qrg", guess.get("release_group", "")),
+            )
+        )
 
         # De-obfuscated directory name
         (
@@ -442,10 +489,14 @@ class Determine:
             deobfuscated_dirname_underscores,
             deobfuscated_dirname_spaces,
         ) = self.get_deobfuscated_dirname(original_dirname, self.options.deobfuscate_re)
-        mapping.append(("%ddn", deobfuscated_dirname))
-        mapping.append(("%.ddn", deobfuscated_dirname_dots))
-        mapping.append(("%_ddn", deobfuscated_dirname_underscores))
-        mapping.append(("%^ddn", deobfuscated_dirname_spaces))
+        mapping.extend(
+            (
+                ("%ddn", deobfuscated_dirname),
+                ("%.ddn", deobfuscated_dirname_dots),
+                ("%_ddn", deobfuscated_dirname_underscores),
+                ("%^ddn", deobfuscated_dirname_spaces),
+            )
+        )
         (
             deobfuscated_dirname_titled,
             deobfuscated_dirname_titled_dots,
@@ -454,52 +505,66 @@ class Determine:
         ) = self.get_deobfuscated_dirname(
             original_dirname, self.options.deobfuscate_re, title_name
         )
-        mapping.append(("%ddN", deobfuscated_dirname_titled))
-        mapping.append(("%.ddN", deobfuscated_dirname_titled_dots))
-        mapping.append(("%_ddN", deobfuscated_dirname_titled_underscores))
-        mapping.append(("%^ddN", deobfuscated_dirname_titled_spaces))
+        mapping.extend(
+            (
+                ("%ddN", deobfuscated_dirname_titled),
+                ("%.ddN", deobfuscated_dirname_titled_dots),
+                ("%_ddN", deobfuscated_dirname_titled_underscores),
+                ("%^ddN", deobfuscated_dirname_titled_spaces),
+            )
+        )
 
     def add_series_mapping(self, guess, mapping):
         # Show name
         series = guess.get("title", "")
         show_tname, show_tname_two, show_tname_three = self.get_titles(series, True)
         show_name, show_name_two, show_name_three = self.get_titles(series, False)
-        mapping.append(("%sn", show_tname))
-        mapping.append(("%s.n", show_tname_two))
-        mapping.append(("%s_n", show_tname_three))
-        mapping.append(("%sN", show_name))
-        mapping.append(("%s.N", show_name_two))
-        mapping.append(("%s_N", show_name_three))
+        mapping.extend(
+            (
+                ("%sn", show_tname),
+                ("%s.n", show_tname_two),
+                ("%s_n", show_tname_three),
+                ("%sN", show_name),
+                ("%s.N", show_name_two),
+                ("%s_N", show_name_three),
+            )
+        )
 
         # season number
         season_num = str(guess.get("season", ""))
-        mapping.append(("%s", season_num))
-        mapping.append(("%0s", season_num.rjust(2, "0")))
+        mapping.extend((("%s", season_num), ("%0s", season_num.rjust(2, "0"))))
 
         # episode names
         title = guess.get("episode_title")
         if title:
             ep_tname, ep_tname_two, ep_tname_three = self.get_titles(title, True)
             ep_name, ep_name_two, ep_name_three = self.get_titles(title, False)
-            mapping.append(("%en", ep_tname))
-            mapping.append(("%e.n", ep_tname_two))
-            mapping.append(("%e_n", ep_tname_three))
-            mapping.append(("%eN", ep_name))
-            mapping.append(("%e.N", ep_name_two))
-            mapping.append(("%e_N", ep_name_three))
+            mapping.extend(
+                (
+                    ("%en", ep_tname),
+                    ("%e.n", ep_tname_two),
+                    ("%e_n", ep_tname_three),
+                    ("%eN", ep_name),
+                    ("%e.N", ep_name_two),
+                    ("%e_N", ep_name_three),
+                )
+            )
         else:
-            mapping.append(("%en", ""))
-            mapping.append(("%e.n", ""))
-            mapping.append(("%e_n", ""))
-            mapping.append(("%eN", ""))
-            mapping.append(("%e.N", ""))
-            mapping.append(("%e_N", ""))
+            mapping.extend(
+                (
+                    ("%en", ""),
+                    ("%e.n", ""),
+                    ("%e_n", ""),
+                    ("%eN", ""),
+                    ("%e.N", ""),
+                    ("%e_N", ""),
+                )
+            )
 
         # episode number
         if not isinstance(guess.get("episode"), list):
             episode_num = str(guess.get("episode", ""))
-            mapping.append(("%e", episode_num))
-            mapping.append(("%0e", episode_num.rjust(2, "0")))
+            mapping.extend((("%e", episode_num), ("%0e", episode_num.rjust(2, "0"))))
         else:
             # multi episodes
             episodes = [str(item) for item in guess.get("episode")]
@@ -522,8 +587,7 @@ class Determine:
                     episode_num_all += ep_prefix + episode_num
                     episode_num_just += ep_prefix + episode_num.rjust(2, "0")
 
-            mapping.append(("%e", episode_num_all))
-            mapping.append(("%0e", episode_num_just))
+            mapping.extend((("%e", episode_num_all), ("%0e", episode_num_just)))
 
         # year
         year = str(guess.get("year", ""))
@@ -531,26 +595,21 @@ class Determine:
 
         # decades
         decade, decade_two = self.get_decades(year)
-        mapping.append(("%decade", decade))
-        mapping.append(("%0decade", decade_two))
+        mapping.extend((("%decade", decade), ("%0decade", decade_two)))
 
     def add_movies_mapping(self, guess, mapping):
         # title
         name = guess.get("title", "")
         ttitle, ttitle_two, ttitle_three = self.get_titles(name, True)
         title, title_two, title_three = self.get_titles(name, False)
-        mapping.append(("%title", ttitle))
-        mapping.append(("%.title", ttitle_two))
-        mapping.append(("%_title", ttitle_three))
+        mapping.extend(
+            (("%title", ttitle), ("%.title", ttitle_two), ("%_title", ttitle_three))
+        )
 
         # title (short forms)
-        mapping.append(("%t", ttitle))
-        mapping.append(("%.t", ttitle_two))
-        mapping.append(("%_t", ttitle_three))
+        mapping.extend((("%t", ttitle), ("%.t", ttitle_two), ("%_t", ttitle_three)))
 
-        mapping.append(("%tT", title))
-        mapping.append(("%t.T", title_two))
-        mapping.append(("%t_T", title_three))
+        mapping.extend((("%tT", title), ("%t.T", title_two), ("%t_T", title_three)))
 
         # year
         year = str(guess.get("year", ""))
@@ -558,37 +617,45 @@ class Determine:
 
         # decades
         decade, decade_two = self.get_decades(year)
-        mapping.append(("%decade", decade))
-        mapping.append(("%0decade", decade_two))
+        mapping.extend((("%decade", decade), ("%0decade", decade_two)))
 
         # imdb
-        mapping.append(("%imdb", guess.get("imdb", "")))
-        mapping.append(("%cpimdb", guess.get("cpimdb", "")))
+        mapping.extend(
+            (("%imdb", guess.get("imdb", "")), ("%cpimdb", guess.get("cpimdb", "")))
+        )
 
     def add_dated_mapping(self, guess, mapping):
         # title
         name = guess.get("title", "")
         ttitle, ttitle_two, ttitle_three = self.get_titles(name, True)
         title, title_two, title_three = self.get_titles(name, True)
-        mapping.append(("%title", title))
-        mapping.append(("%.title", title_two))
-        mapping.append(("%_title", title_three))
+        mapping.extend(
+            (("%title", title), ("%.title", title_two), ("%_title", title_three))
+        )
 
         # title (short forms)
-        mapping.append(("%t", title, "consider using %sn"))
-        mapping.append(("%.t", title_two, "consider using %s.n"))
-        mapping.append(("%_t", title_three, "consider using %s_n"))
+        mapping.extend(
+            (
+                ("%t", title, "consider using %sn"),
+                ("%.t", title_two, "consider using %s.n"),
+                ("%_t", title_three, "consider using %s_n"),
+            )
+        )
 
         # Show name
         series = guess.get("title", "")
         show_tname, show_tname_two, show_tname_three = self.get_titles(series, True)
         show_name, show_name_two, show_name_three = self.get_titles(series, False)
-        mapping.append(("%sn", show_tname))
-        mapping.append(("%s.n", show_tname_two))
-        mapping.append(("%s_n", show_tname_three))
-        mapping.append(("%sN", show_name))
-        mapping.append(("%s.N", show_name_two))
-        mapping.append(("%s_N", show_name_three))
+        mapping.extend(
+            (
+                ("%sn", show_tname),
+                ("%s.n", show_tname_two),
+                ("%s_n", show_tname_three),
+                ("%sN", show_name),
+                ("%s.N", show_name_two),
+                ("%s_N", show_name_three),
+            )
+        )
 
         # Some older code at this point stated:
         # "Guessit doesn't provide episode names for dated tv shows"
@@ -598,42 +665,44 @@ class Determine:
         if ep_title:
             ep_tname, ep_tname_two, ep_tname_three = self.get_titles(ep_title, True)
             ep_name, ep_name_two, ep_name_three = self.get_titles(ep_title, False)
-            mapping.append(("%en", ep_tname))
-            mapping.append(("%e.n", ep_tname_two))
-            mapping.append(("%e_n", ep_tname_three))
-            mapping.append(("%eN", ep_name))
-            mapping.append(("%e.N", ep_name_two))
-            mapping.append(("%e_N", ep_name_three))
+            mapping.extend(
+                (
+                    ("%en", ep_tname),
+                    ("%e.n", ep_tname_two),
+                    ("%e_n", ep_tname_three),
+                    ("%eN", ep_name),
+                    ("%e.N", ep_name_two),
+                    ("%e_N", ep_name_three),
+                )
+            )
         else:
-            mapping.append(("%en", ""))
-            mapping.append(("%e.n", ""))
-            mapping.append(("%e_n", ""))
-            mapping.append(("%eN", ""))
-            mapping.append(("%e.N", ""))
-            mapping.append(("%e_N", ""))
+            mapping.extend(
+                (
+                    ("%en", ""),
+                    ("%e.n", ""),
+                    ("%e_n", ""),
+                    ("%eN", ""),
+                    ("%e.N", ""),
+                    ("%e_N", ""),
+                )
+            )
 
         # date
         date = guess.get("date")
 
         # year
         year = str(date.year)
-        mapping.append(("%year", year))
-        mapping.append(("%y", year))
+        mapping.extend((("%year", year), ("%y", year)))
 
         # decades
         decade, decade_two = self.get_decades(year)
-        mapping.append(("%decade", decade))
-        mapping.append(("%0decade", decade_two))
+        mapping.extend((("%decade", decade), ("%0decade", decade_two)))
 
         # month
-        month = str(date.month)
-        mapping.append(("%m", month))
-        mapping.append(("%0m", month.rjust(2, "0")))
+        mapping.extend((("%m", f"{date.month:d}"), ("%0m", f"{date.month:02d}")))
 
         # day
-        day = str(date.day)
-        mapping.append(("%d", day))
-        mapping.append(("%0d", day.rjust(2, "0")))
+        mapping.extend((("%d", f"{date.day:d}"), ("%0d", f"{date.day:02d}")))
 
     def strip_useless_parts(self, filename):
         start = os.path.dirname(self.options.download_dir)
@@ -648,7 +717,7 @@ class Determine:
         part_removed = 0
         for x in range(0, len(parts) - 1):
             fn = parts[x]
-            if fn.find(".") == -1 and fn.find("_") == -1 and fn.find(" ") == -1:
+            if Determine._SEPARATOR_CHARS.isdisjoint(fn):
                 loginf(
                     "Detected obfuscated directory name %s, removing from guess path"
                     % fn
@@ -657,7 +726,7 @@ class Determine:
                 part_removed += 1
 
         fn = os.path.splitext(parts[len(parts) - 1])[0]
-        if fn.find(".") == -1 and fn.find("_") == -1 and fn.find(" ") == -1:
+        if Determine._SEPARATOR_CHARS.isdisjoint(fn):
             loginf(
                 "Detected obfuscated filename %s, removing from guess path"
                 % os.path.basename(filename)
@@ -666,10 +735,7 @@ class Determine:
             part_removed += 1
 
         if part_removed < len(parts):
-            new_name = ""
-            for x in range(0, len(parts)):
-                if parts[x] is not None:
-                    new_name = os.path.join(new_name, parts[x])
+            new_name = os.path.join(*[part for part in parts if part is not None])
         else:
             loginf("All file path parts are obfuscated, using obfuscated NZB-Name")
             new_name = (
@@ -681,9 +747,9 @@ class Determine:
 
     def remove_year(self, title):
         """Removes year from series name (if exist)"""
-        m = re.compile(r"..*(\((19|20)\d\d\))").search(title)
+        m = Determine._RE_YEAR_PAREN.search(title)
         if not m:
-            m = re.compile(r"..*((19|20)\d\d)").search(title)
+            m = Determine._RE_YEAR_BARE.search(title)
         if m:
             if self.options.verbose:
                 loginf("Removing year from series name")
@@ -692,11 +758,12 @@ class Determine:
 
     def apply_dnzb_headers(self, guess):
         """Applies DNZB headers (if exist)"""
+        verbose = self.options.verbose
 
         dnzb_used = False
         if self.options.dnzb_proper_name != "":
             dnzb_used = True
-            if self.options.verbose:
+            if verbose:
                 loginf("Using DNZB-ProperName")
             if guess["vtype"] == "series":
                 proper_name = self.options.dnzb_proper_name
@@ -708,30 +775,27 @@ class Determine:
 
         if self.options.dnzb_episode_name != "" and guess["vtype"] == "series":
             dnzb_used = True
-            if self.options.verbose:
+            if verbose:
                 loginf("Using DNZB-EpisodeName")
             guess["episode_title"] = self.options.dnzb_episode_name
 
         if self.options.dnzb_movie_year != "":
             dnzb_used = True
-            if self.options.verbose:
+            if verbose:
                 loginf("Using DNZB-MovieYear")
             guess["year"] = self.options.dnzb_movie_year
 
         if self.options.dnzb_more_info != "":
             dnzb_used = True
-            if self.options.verbose:
+            if verbose:
                 loginf("Using DNZB-MoreInfo")
             if guess["type"] == "movie":
-                regex = re.compile(
-                    r"^http://www.imdb.com/title/(tt[0-9]+)/$", re.IGNORECASE
-                )
-                matches = regex.match(self.options.dnzb_more_info)
+                matches = Determine._RE_IMDB.match(self.options.dnzb_more_info)
                 if matches:
                     guess["imdb"] = matches.group(1)
                     guess["cpimdb"] = "cp(" + guess["imdb"] + ")"
 
-        if self.options.verbose and dnzb_used:
+        if verbose and dnzb_used:
             loginf(guess)
 
     def year_and_season_equal(self, guess):
@@ -742,23 +806,21 @@ class Determine:
         )
 
     def is_movie(self, guess):
-        has_no_episode = guess.get("type") == "episode" and guess.get("episode") is None
-        is_movie = (
-            has_no_episode
-            or guess.get("edition")
-            or (self.year_and_season_equal(guess) and guess.get("type") != "episode")
-        )
-        return is_movie
+        if guess.get("type") == "episode":
+            # An episode without episode number is a movie
+            return guess.get("episode") is None or guess.get("edition")
+        return guess.get("edition") or self.year_and_season_equal(guess)
 
     def guess_info(self, filename):
         """Parses the filename using guessit-library"""
+        options = self.options
+        verbose = options.verbose
 
-        if self.options.use_nzb_name:
-            if self.options.verbose:
+        if options.use_nzb_name:
+            if verbose:
                 loginf("Using NZB-Name")
             guessfilename = (
-                os.path.basename(self.options.download_dir)
-                + os.path.splitext(filename)[1]
+                os.path.basename(options.download_dir) + os.path.splitext(filename)[1]
             )
         else:
             guessfilename = self.strip_useless_parts(filename)
@@ -769,7 +831,7 @@ class Determine:
         if pad_start_digits:
             guessfilename = os.path.join(path, "T" + tmp_filename)
 
-        if self.options.verbose:
+        if verbose:
             loginf(f'Calling GuessIt with "{guessfilename}"')
 
         # Use guessit directly as Python 3 handles Unicode by default
@@ -777,7 +839,7 @@ class Determine:
             guessfilename, {"allowed_languages": [], "allowed_countries": []}
         )
 
-        if self.options.verbose:
+        if verbose:
             loginf(guess)
 
         # workaround for titles starting with numbers (part 2)
@@ -787,7 +849,7 @@ class Determine:
                 guess["title"] = os.path.splitext(os.path.basename(guessfilename))[0][
                     1:
                 ]
-                if self.options.verbose:
+                if verbose:
                     loginf("use filename as title for recovery")
 
         # fix some strange guessit guessing:
@@ -796,144 +858,137 @@ class Determine:
 
         if self.is_movie(guess):
             guess["type"] = "movie"
-            if self.options.verbose:
+            if verbose:
                 loginf("episode without episode-number is a movie")
+        guess_type = guess["type"]
+        if guess_type == "movie":
+            self.classify_movie(guess)
+        elif guess_type == "episode":
+            self.classify_episode(guess)
+        else:
+            guess["vtype"] = guess_type
+
+        if options.dnzb_headers:
+            self.apply_dnzb_headers(guess)
+
+        if verbose:
+            loginf("Type: %s" % guess["vtype"])
 
+        if verbose:
+            loginf(guess)
+
+        return guess
+
+    def classify_movie(self, guess):
+        """Sets the video type of a guess of type "movie" """
         # treat parts as episodes ("Part.2" or "Part.II")
-        if guess.get("type") == "movie" and guess.get("part") is not None:
+        part = guess.get("part")
+        if part is not None:
             guess["type"] = "episode"
-            guess["episode"] = guess.get("part")
+            guess["episode"] = part
             if self.options.verbose:
                 loginf("treat parts as episodes")
+            self.classify_episode(guess)
+        elif guess.get("date"):
+            guess["vtype"] = "dated"
+        elif self.options.force_tv:
+            guess["vtype"] = "othertv"
+        else:
+            guess["vtype"] = "movie"
 
+    def classify_episode(self, guess):
+        """Sets the video type of a guess of type "episode" """
         # add season number if not present
-        if guess["type"] == "episode" and (
-            guess.get("season") is None or self.year_and_season_equal(guess)
-        ):
-            guess["season"] = 1
+        season = guess.get("season")
+        if season is None or self.year_and_season_equal(guess):
+            season = guess["season"] = 1
             if self.options.verbose:
                 loginf("force season 1")
 
         # detect if year is part of series name
-        if guess["type"] == "episode":
-            if self.options.series_year:
-                if (
-                    guess.get("year") is not None
-                    and guess.get("title") is not None
-                    and guess.get("season") != guess.get("year")
-                    and guess["title"] == self.remove_year(guess["title"])
-                ):
-                    guess["title"] += " " + str(guess["year"])
-                    if self.options.verbose:
-                        loginf("year is part of title")
-            else:
-                guess["title"] = self.remove_year(guess["title"])
-
-        if guess["type"] == "movie":
-            date = guess.get("date")
-            if date:
-                guess["vtype"] = "dated"
-            elif self.options.force_tv:
-                guess["vtype"] = "othertv"
-            else:
-                guess["vtype"] = "movie"
-        elif guess["type"] == "episode":
-            guess["vtype"] = "series"
+        if self.options.series_year:
+            year = guess.get("year")
+            title = guess.get("title")
+            if (
+                year is not None
+                and title is not None
+                and season != year
+                and title == self.remove_year(title)
+            ):
+                guess["title"] = title + " " + str(year)
+                if self.options.verbose:
+                    loginf("year is part of title")
         else:
-            guess["vtype"] = guess["type"]
+            guess["title"] = self.remove_year(guess["title"])
 
-        if self.options.dnzb_headers:
-            self.apply_dnzb_headers(guess)
-
-        if self.options.verbose:
-            loginf("Type: %s" % guess["vtype"])
-
-        if self.options.verbose:
-            loginf(guess)
-
-        return guess
+        guess["vtype"] = "series"
 
     def guess_dupe_separator(self, format):
         """Find out a char most suitable as dupe_separator"""
-
-        self.options.dupe_separator = " "
-        format_fname = os.path.basename(format)
-
-        for x in ("%.t", "%s.n", "%s.N"):
-            if format_fname.find(x) > -1:
-                self.options.dupe_separator = "."
-                return
-
-        for x in ("%_t", "%s_n", "%s_N"):
-            if format_fname.find(x) > -1:
-                self.options.dupe_separator = "_"
-                return
+        dupe_separator = self._dupe_separators.get(format)
+        if dupe_separator is None:
+            format_fname = os.path.basename(format)
+            if Determine._RE_DUPE_DOTS.search(format_fname):
+                dupe_separator = "."
+            elif Determine._RE_DUPE_UNDERSCORES.search(format_fname):
+                dupe_separator = "_"
+            else:
+                dupe_separator = " "
+            self._dupe_separators[format] = dupe_separator
+        self.options.dupe_separator = dupe_separator
 
     def construct_path(self, filename):
         """Parses the filename and generates new name for renaming"""
+        options = self.options
+        verbose = options.verbose
 
-        if self.options.verbose:
+        if verbose:
             loginf("filename: %s" % filename)
 
         guess = self.guess_info(filename)
-        type = guess.get("vtype")
-        mapping = []
-        self.add_common_mapping(filename, guess, mapping)
-
-        if type == "movie":
-            dest_dir = self.options.movies_dir
-            format = self.options.movies_format
-            self.add_movies_mapping(guess, mapping)
-        elif type == "series":
-            dest_dir = self.options.series_dir
-            format = self.options.series_format
-            self.add_series_mapping(guess, mapping)
-        elif type == "dated":
-            dest_dir = self.options.dated_dir
-            format = self.options.dated_format
-            self.add_dated_mapping(guess, mapping)
-        elif type == "othertv":
-            dest_dir = self.options.othertv_dir
-            format = self.options.othertv_format
-            self.add_movies_mapping(guess, mapping)
-        else:
-            if self.options.verbose:
+        vtype = Determine._VTYPES.get(guess.get("vtype"))
+        if vtype is None:
+            if verbose:
                 loginf("Could not determine video type for %s" % filename)
             return None
 
+        dir_option, format_option, add_mapping = vtype
+        dest_dir = getattr(options, dir_option)
+        format = getattr(options, format_option)
+        mapping = []
+        self.add_common_mapping(filename, guess, mapping)
+        getattr(self, add_mapping)(guess, mapping)
+
         if dest_dir == "":
-            dest_dir = os.path.dirname(self.options.download_dir)
+            dest_dir = os.path.dirname(options.download_dir)
 
         # Find out a char most suitable as dupe_separator
         self.guess_dupe_separator(format)
 
         # Add extension specifier if the format string doesn't end with it
-        if format.rstrip("}")[-5:].lower() != ".%ext":
+        if not Determine._RE_EXT_SPECIFIER.search(format):
             format += ".%ext"
 
         sorter = format.replace("\\", "/")
 
-        if self.options.verbose:
+        if verbose:
             loginf("format: %s" % sorter)
 
         # Replace elements
         path = Determine.path_subst(sorter, mapping)
 
-        if self.options.verbose:
+        if verbose:
             loginf("path after subst: %s" % path)
 
-        # Cleanup file name
-        old_path = ""
-        while old_path != path:
-            old_path = path
-            for key, name in Determine._REPLACE_AFTER.items():
-                path = path.replace(key, name)
-
-        # Uppercase all characters encased in {{}}
-        path = Determine.to_uppercase(path)
+        # Cleanup file name, repeat as replacements may produce new matches
+        count = 1
+        while count:
+            path, count = Determine._RE_REPLACE_AFTER.subn(
+                lambda m: Determine._REPLACE_AFTER[m.group(0)], path
+            )
 
-        # Lowercase all characters encased in {}
-        path = Determine.to_lowercase(path)
+        # Uppercase all characters encased in {{}}, lowercase all characters encased in {}
+        path = Determine.change_case(path)
 
         # Strip any extra strippable characters around foldernames and filename
         path, ext = os.path.splitext(path)
@@ -943,38 +998,27 @@ class Determine:
         path = path.replace("%up", "..")
 
         path = os.path.normpath(path)
-        dest_dir = os.path.normpath(dest_dir)
 
-        if self.options.verbose:
+        if verbose:
             loginf("path after cleanup: %s" % path)
 
-        new_path = os.path.normpath(os.path.join(dest_dir, *path.split(os.sep)))
+        # The path is always placed inside dest_dir, even if it is absolute
+        new_path = os.path.normpath(os.path.join(dest_dir, path.lstrip(os.sep)))
 
-        if self.options.verbose:
+        if verbose:
             loginf("destination path: %s" % new_path)
 
         if filename.upper() == new_path.upper():
-            if self.options.verbose:
+            if verbose:
                 loginf(f'construct_path: "{filename}" == "{new_path}": return None')
             return None
 
-        if self.options.verbose:
+        if verbose:
             loginf(f'construct_path: "{filename}" --> "{new_path}"')
         return new_path
 
 
-class deprecation_support:
-    """Class implementing iterator for deprecation message support"""
-
-    def __init__(self, mapping):
-        self.iter = iter(mapping)
-
-    def __iter__(self):
-        return self
-
-    def __next__(self):
-        map_entry = next(self.iter)
-        return map_entry if len(map_entry) >= 3 else list(map_entry) + [None]
-
-    def next(self):
-        return self.__next__()
+def deprecation_support(mapping):
+    """Generator padding mapping entries without deprecation message with None"""
+    for map_entry in mapping:
+        yield map_entry if len(map_entry) >= 3 else (map_entry[0], map_entry[1], None)
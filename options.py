@@ -6,43 +6,45 @@ from nzbget_utils import POSTPROCESS_ERROR, logerr, loginf, logwar
 
 class Options:
     # GuessIt supported video extensions
-    _VIDEO_EXTENSIONS = (
-        "3g2",
-        "3gp",
-        "3gp2",
-        "asf",
-        "avi",
-        "divx",
-        "flv",
-        "iso",
-        "m4v",
-        "mk2",
-        "mk3d",
-        "mka",
-        "mkv",
-        "mov",
-        "mp4",
-        "mp4a",
-        "mpeg",
-        "mpg",
-        "ogg",
-        "ogm",
-        "ogv",
-        "qt",
-        "ra",
-        "ram",
-        "rm",
-        "ts",
-        "m2ts",
-        "vob",
-        "wav",
-        "webm",
-        "wma",
-        "wmv",
+    _VIDEO_EXTENSIONS = frozenset(
+        (
+            "3g2",
+            "3gp",
+            "3gp2",
+            "asf",
+            "avi",
+            "divx",
+            "flv",
+            "iso",
+            "m4v",
+            "mk2",
+            "mk3d",
+            "mka",
+            "mkv",
+            "mov",
+            "mp4",
+            "mp4a",
+            "mpeg",
+            "mpg",
+            "ogg",
+            "ogm",
+            "ogv",
+            "qt",
+            "ra",
+            "ram",
+            "rm",
+            "ts",
+            "m2ts",
+            "vob",
+            "wav",
+            "webm",
+            "wma",
+            "wmv",
+        )
     )
 
     # GuessIt supported subtitle extensions
-    _SATELLITE_EXTENSIONS = ["srt", "idx", "sub", "ssa", "ass"]
+    _SATELLITE_EXTENSIONS = frozenset(("srt", "idx", "sub", "ssa", "ass"))
 
     def __init__(self):
         self.required_options = (
@@ -87,8 +87,10 @@ def set_defaults():
     os.environ["NZBPO_SERIESDIR"] = get_test_dir_path_file("series").as_posix()
     os.environ["NZBPO_DATEDDIR"] = get_test_dir_path_file("dated").as_posix()
     os.environ["NZBPO_OTHERTVDIR"] = get_test_dir_path_file("tv").as_posix()
-    os.environ["NZBPO_VIDEOEXTENSIONS"] = ",".join(Options._VIDEO_EXTENSIONS)
-    os.environ["NZBPO_SATELLITEEXTENSIONS"] = ",".join(Options._SATELLITE_EXTENSIONS)
+    os.environ["NZBPO_VIDEOEXTENSIONS"] = ",".join(sorted(Options._VIDEO_EXTENSIONS))
+    os.environ["NZBPO_SATELLITEEXTENSIONS"] = ",".join(
+        sorted(Options._SATELLITE_EXTENSIONS)
+    )
     os.environ["NZBPO_MULTIPLEEPISODES"] = "list"
     os.environ["NZBPO_EPISODESEPARATOR"] = "-"
     os.environ["NZBPO_MINSIZE"] = "0"